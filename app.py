@@ -1,102 +1,265 @@
-from flask import Flask, request, jsonify
+from quart import Quart, request
+import asyncio
+import mmap
+import msgspec
+import os
 import pickle
 import numpy as np
+import orjson
+import tensorflow as tf
 from tensorflow import keras
+from json_provider import OrjsonProvider
 
-app = Flask(__name__)
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
 
-# Load the saved model from the pickle file
-with open("diet_workout_model.pkl", "rb") as f:
-    model_dict = pickle.load(f)
+def _json(obj, status=200):
+    # Encode straight to bytes, skipping the str round trip jsonify makes
+    return app.response_class(orjson.dumps(obj), status=status, mimetype="application/json")
 
-# Rebuild the model from its JSON structure and load weights
-model = keras.models.model_from_json(model_dict["model_json"])
-model.set_weights(model_dict["model_weights"])
+# --- Micro-batching settings (tune P99 latency vs throughput per deployment) ---
+MAX_BATCH = int(os.environ.get("MAX_BATCH", "32"))              # max rows per model call
+MAX_WAIT_MS = float(os.environ.get("MAX_WAIT_MS", "10"))        # max time to wait for a batch to fill
+MAX_QUEUE = int(os.environ.get("MAX_QUEUE", "1024"))            # pending requests before rejecting
+BATCH_TIMEOUT = float(os.environ.get("BATCH_TIMEOUT", "5"))     # seconds a request waits for its result
 
-@app.route('/predict', methods=['POST'])
-def predict():
-    data = request.get_json()
+# --- TF runtime settings (must run before the first TF op) ---
+# One thread per process by default; scale out with more workers instead
+INTRAOP_THREADS = int(os.environ.get("TF_NUM_INTRAOP_THREADS", "1"))
+INTEROP_THREADS = int(os.environ.get("TF_NUM_INTEROP_THREADS", "1"))
+tf.config.threading.set_intra_op_parallelism_threads(INTRAOP_THREADS)
+tf.config.threading.set_inter_op_parallelism_threads(INTEROP_THREADS)
+tf.config.optimizer.set_jit(True)
+
+MODEL_PICKLE = "diet_workout_model.pkl"
+MODEL_KERAS = "diet_workout_model.keras"    # produced at build time by convert_model.py
+MODEL_TFLITE = "diet_workout_model.tflite"  # also from convert_model.py
+
+def _load_keras_model():
+    if os.path.exists(MODEL_KERAS):
+        # Native Keras format: no pickle, no JSON rebuild
+        return keras.models.load_model(MODEL_KERAS, compile=False)
+
+    # Load the saved model from the pickle file through a read-only mapping,
+    # so workers share the page cache rather than each buffering the file
+    with open(MODEL_PICKLE, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            model_dict = pickle.loads(mm)
+
+    # Rebuild the model from its JSON structure and load weights
+    model = keras.models.model_from_json(model_dict["model_json"])
+    model.set_weights(model_dict["model_weights"])
+    return model
+
+# Both backends below take a fixed [MAX_BATCH, 13] input; the batcher
+# zero-pads smaller batches so there is exactly one shape to compile/allocate.
+if os.path.exists(MODEL_TFLITE):
+    # Serve through the TFLite interpreter, using the "serve" signature that
+    # convert_model.py exports with named diet/workout outputs. The input
+    # shape never changes, so tensors are only allocated on the first call.
+    interpreter = tf.lite.Interpreter(model_path=MODEL_TFLITE, num_threads=INTRAOP_THREADS)
+    _serve = interpreter.get_signature_runner("serve")
+
+    def _run_batch(batch):
+        # One interpreter call for the whole batch (shape: [MAX_BATCH, 13])
+        outputs = _serve(features=batch)
+        return outputs["diet"], outputs["workout"]
+else:
+    model = _load_keras_model()
+
+    # Trace the forward pass once into an XLA-compiled concrete function so the
+    # request path skips keras.Model.predict's per-call dispatch and retracing.
+    # The static batch size means XLA compiles a single executable.
+    _infer = tf.function(lambda x: model(x, training=False), jit_compile=True)
+    predict_fn = _infer.get_concrete_function(tf.TensorSpec([MAX_BATCH, 13], tf.float32))
+
+    def _run_batch(batch):
+        # One model call for the whole batch (shape: [MAX_BATCH, 13])
+        predicted_diet, predicted_workout = predict_fn(tf.convert_to_tensor(batch, dtype=tf.float32))
+        return predicted_diet.numpy(), predicted_workout.numpy()
+
+# Warm up once so the first real request doesn't pay the compile cost
+_run_batch(np.zeros((MAX_BATCH, 13), dtype=np.float32))
+
+# Each entry is a (features, future) record; the batcher resolves `future`
+# with the prediction once the batch has been run. Created on the serving loop.
+_pending = None
+_batcher = None
+
+# Rows of the next batch are written straight into this float32 buffer
+# (the model's compute dtype) and the rest zeroed; only one batch is in
+# flight at a time.
+_batch_buffer = np.empty((MAX_BATCH, 13), dtype=np.float32)
+
+async def _batch_worker():
+    loop = asyncio.get_running_loop()
+    while True:
+        records = [await _pending.get()]
+        deadline = loop.time() + MAX_WAIT_MS / 1000.0
+        while len(records) < MAX_BATCH:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                records.append(await asyncio.wait_for(_pending.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        futures = []
+        for features, future in records:
+            if future.done():  # caller already timed out
+                continue
+            try:
+                _batch_buffer[len(futures)] = features
+            except (TypeError, ValueError) as e:
+                future.set_exception(e)
+                continue
+            futures.append(future)
+        if not futures:
+            continue
+
+        # Run TF off the event loop so other requests keep being accepted
+        _batch_buffer[len(futures):] = 0
+        try:
+            predicted_diet, predicted_workout = await loop.run_in_executor(None, _run_batch, _batch_buffer)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        for i, future in enumerate(futures):
+            if not future.done():  # caller may already have timed out
+                future.set_result((predicted_diet[i][0], predicted_workout[i][0]))
+
+@app.before_serving
+async def _start_batcher():
+    global _pending, _batcher
+    _pending = asyncio.Queue(maxsize=MAX_QUEUE)
+    _batcher = asyncio.create_task(_batch_worker())
 
-    # --- Parse required input parameters for model prediction ---
+@app.after_serving
+async def _stop_batcher():
+    _batcher.cancel()
+
+# --- Static sample plans, built once at import and treated as read-only ---
+_MEALS = (
+    {"Meal": "Breakfast", "Food": "Oatmeal + Nuts", "Calories": "350 kcal",
+     "Alternative": "Whole Wheat Toast", "Allergen": "nuts"},
+    {"Meal": "Lunch", "Food": "Grilled Chicken + Peanut Sauce", "Calories": "600 kcal",
+     "Alternative": "Tofu + Salad", "Allergen": "nuts"},
+    {"Meal": "Dinner", "Food": "Fish + Almond Quinoa", "Calories": "500 kcal",
+     "Alternative": "Lentil Soup + Rice", "Allergen": "nuts"}
+)
+
+# (allergen, regular entry, allergy-safe entry) per meal; allergens are
+# stored lowercase so they compare directly with the lowercased user input
+_MEAL_CHOICES = tuple(
+    (m["Allergen"],
+     {"Meal": m["Meal"], "Food": m["Food"], "Calories": m["Calories"], "AllergySafe": True},
+     {"Meal": m["Meal"], "Food": m["Alternative"], "Calories": m["Calories"], "AllergySafe": True})
+    for m in _MEALS
+)
+
+def _meal_plan_for(allergy):
+    return tuple(safe if allergy and allergy in allergen else regular
+                 for allergen, regular, safe in _MEAL_CHOICES)
+
+# A meal is substituted when the user's allergy is a substring of its
+# allergen, so only substrings of the known allergens can change the plan;
+# every other allergy gets the regular plan.
+_MEAL_PLAN_REGULAR = _meal_plan_for("")
+_MEAL_PLANS_BY_ALLERGY = {
+    allergen[i:j]: _meal_plan_for(allergen[i:j])
+    for allergen, _, _ in _MEAL_CHOICES
+    for i in range(len(allergen))
+    for j in range(i + 1, len(allergen) + 1)
+}
+
+_WORKOUTS = (
+    {"Exercise": "Bench Press", "Type": "Strength", "Reps/Sets": "4 sets x 8 reps", "CaloriesBurned": "250 kcal"},
+    {"Exercise": "Deadlifts", "Type": "Strength", "Reps/Sets": "4 sets x 6 reps", "CaloriesBurned": "300 kcal"},
+    {"Exercise": "Cycling", "Type": "Cardio", "Reps/Sets": "30 mins", "CaloriesBurned": "400 kcal"},
+    {"Exercise": "Jump Rope", "Type": "Cardio", "Reps/Sets": "15 mins", "CaloriesBurned": "150 kcal"}
+)
+
+# Only include Strength workouts if the goal is "muscle-gain",
+# only include Cardio if "weight-loss", all for "general-fitness".
+# Any other goal gets an empty plan.
+_WORKOUT_PLANS = {
+    "muscle-gain": tuple(w for w in _WORKOUTS if w["Type"].lower() == "strength"),
+    "weight-loss": tuple(w for w in _WORKOUTS if w["Type"].lower() == "cardio"),
+    "general-fitness": _WORKOUTS,
+}
+
+# --- Request body schema, decoded and validated in one pass by msgspec ---
+class PredictRequest(msgspec.Struct):
+    # Required input parameters for model prediction. All are accepted as any
+    # JSON number (scales report e.g. 72.5 kg); the model reads them as float32.
+    age: float
+    gender: float                   # 0: Male, 1: Female
+    height_cm: float
+    weight_kg: float
+    bmi: float
+    body_fat_percent: float
+    muscle_mass_kg: float
+    bone_mass_kg: float
+    water_percent: float
+    bmr_kcal: float
+    visceral_fat: float
+    metabolic_age: float
+    activity_level: float           # 0: Sedentary, 1: Moderate, 2: Active
+
+    # Additional parameters for personalization
+    user_allergy: str = ""                  # e.g., "nuts"
+    user_preference: str = ""               # e.g., "high-protein"
+    diet_type: str = "Regular"              # e.g., "Vegan", "Keto", etc.
+    workout_preference: str = "Gym"         # e.g., "Gym", "Outdoor", "Home"
+    user_goal: str = "general-fitness"      # e.g., "muscle-gain", "weight-loss"
+
+_predict_decoder = msgspec.json.Decoder(PredictRequest)
+
+@app.route('/predict', methods=['POST'])
+async def predict():
+    # --- Parse and validate the request body ---
     try:
-        age = data['age']                        # int
-        gender = data['gender']                  # int (0: Male, 1: Female)
-        height_cm = data['height_cm']            # int
-        weight_kg = data['weight_kg']            # int
-        bmi = data['bmi']                        # float
-        body_fat_percent = data['body_fat_percent']  # float
-        muscle_mass_kg = data['muscle_mass_kg']    # float
-        bone_mass_kg = data['bone_mass_kg']        # float
-        water_percent = data['water_percent']      # float
-        bmr_kcal = data['bmr_kcal']              # int
-        visceral_fat = data['visceral_fat']        # int
-        metabolic_age = data['metabolic_age']      # int
-        activity_level = data['activity_level']    # int (0: Sedentary, 1: Moderate, 2: Active)
-    except KeyError as e:
-        return jsonify({"error": f"Missing parameter: {str(e)}"}), 400
-
-    # --- Additional parameters for personalization ---
-    user_allergy = data.get('user_allergy', "").lower()             # string, e.g., "nuts"
-    user_preference = data.get('user_preference', "").lower()           # string, e.g., "high-protein"
-    diet_type = data.get('diet_type', "Regular")                        # string, e.g., "Vegan", "Keto", etc.
-    workout_preference = data.get('workout_preference', "Gym")          # string, e.g., "Gym", "Outdoor", "Home"
-    user_goal = data.get('user_goal', "general-fitness").lower()        # string, e.g., "muscle-gain", "weight-loss"
-
-    # --- Prepare the input vector for the model (shape: [1, 13]) ---
-    input_features = np.array([[age, gender, height_cm, weight_kg, bmi, body_fat_percent,
-                                muscle_mass_kg, bone_mass_kg, water_percent, bmr_kcal,
-                                visceral_fat, metabolic_age, activity_level]])
+        data = _predict_decoder.decode(await request.get_data())
+    except msgspec.ValidationError as e:
+        return _json({"error": f"Invalid parameters: {str(e)}"}, 422)
+    except msgspec.DecodeError as e:
+        return _json({"error": f"Invalid JSON body: {str(e)}"}, 400)
+
+    # Lowercase the user's inputs once; the plan tables are keyed in lowercase
+    user_allergy = data.user_allergy.lower()
+    user_goal = data.user_goal.lower()
+
+    # --- Prepare the input row for the model (13 values, copied into the batch buffer) ---
+    input_features = (data.age, data.gender, data.height_cm, data.weight_kg, data.bmi,
+                      data.body_fat_percent, data.muscle_mass_kg, data.bone_mass_kg,
+                      data.water_percent, data.bmr_kcal, data.visceral_fat,
+                      data.metabolic_age, data.activity_level)
     
-    # --- Run prediction ---
-    predicted_diet, predicted_workout = model.predict(input_features)
-    predicted_diet = int(predicted_diet[0][0])
-    predicted_workout = int(predicted_workout[0][0])
+    # --- Run prediction (batched with other in-flight requests) ---
+    future = asyncio.get_running_loop().create_future()
+    try:
+        _pending.put_nowait((input_features, future))
+    except asyncio.QueueFull:
+        return _json({"error": "Server busy, try again later"}, 503)
+    try:
+        predicted_diet, predicted_workout = await asyncio.wait_for(future, BATCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return _json({"error": "Prediction timed out"}, 503)
+    except Exception as e:
+        return _json({"error": f"Prediction failed: {str(e)}"}, 500)
+    predicted_diet = int(predicted_diet)
+    predicted_workout = int(predicted_workout)
 
-    # --- Generate a sample meal plan ---
+    # --- Pick the sample meal plan ---
     # (If the user is allergic to "nuts", substitute with an alternative food.)
-    meals = [
-        {"Meal": "Breakfast", "Food": "Oatmeal + Nuts", "Calories": "350 kcal",
-         "Alternative": "Whole Wheat Toast", "Allergen": "nuts"},
-        {"Meal": "Lunch", "Food": "Grilled Chicken + Peanut Sauce", "Calories": "600 kcal",
-         "Alternative": "Tofu + Salad", "Allergen": "nuts"},
-        {"Meal": "Dinner", "Food": "Fish + Almond Quinoa", "Calories": "500 kcal",
-         "Alternative": "Lentil Soup + Rice", "Allergen": "nuts"}
-    ]
-    meal_plan = []
-    for m in meals:
-        # Check if the food contains an allergen (here, "nuts")
-        if user_allergy and user_allergy in m["Allergen"].lower():
-            meal_plan.append({
-                "Meal": m["Meal"],
-                "Food": m["Alternative"],
-                "Calories": m["Calories"],
-                "AllergySafe": True
-            })
-        else:
-            meal_plan.append({
-                "Meal": m["Meal"],
-                "Food": m["Food"],
-                "Calories": m["Calories"],
-                "AllergySafe": True
-            })
-
-    # --- Generate a sample workout plan ---
-    # Only include Strength workouts if the goal is "muscle-gain",
-    # only include Cardio if "weight-loss", otherwise include all.
-    workouts = [
-        {"Exercise": "Bench Press", "Type": "Strength", "Reps/Sets": "4 sets x 8 reps", "CaloriesBurned": "250 kcal"},
-        {"Exercise": "Deadlifts", "Type": "Strength", "Reps/Sets": "4 sets x 6 reps", "CaloriesBurned": "300 kcal"},
-        {"Exercise": "Cycling", "Type": "Cardio", "Reps/Sets": "30 mins", "CaloriesBurned": "400 kcal"},
-        {"Exercise": "Jump Rope", "Type": "Cardio", "Reps/Sets": "15 mins", "CaloriesBurned": "150 kcal"}
-    ]
-    workout_plan = []
-    for w in workouts:
-        if user_goal == "muscle-gain" and w["Type"].lower() == "strength":
-            workout_plan.append(w)
-        elif user_goal == "weight-loss" and w["Type"].lower() == "cardio":
-            workout_plan.append(w)
-        elif user_goal == "general-fitness":
-            workout_plan.append(w)
+    meal_plan = _MEAL_PLANS_BY_ALLERGY.get(user_allergy, _MEAL_PLAN_REGULAR)
+
+    # --- Pick the sample workout plan ---
+    workout_plan = _WORKOUT_PLANS.get(user_goal, ())
 
     # --- Compose the JSON response ---
     response = {
@@ -106,7 +269,7 @@ def predict():
         "WorkoutPlan": workout_plan
     }
     
-    return jsonify(response)
+    return _json(response)
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run(debug=False)
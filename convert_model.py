@@ -0,0 +1,92 @@
+import os
+import pickle
+import sys
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+# Convert the pickled model (JSON structure + weights) to the native .keras
+# format and to a TFLite model. app.py serves the TFLite model when present
+# and falls back to the .keras file, then the pickle.
+#
+# The TFLite model keeps float32 weights by default. Set TFLITE_QUANTIZATION
+# to "float16" (float16 weights) or "dynamic" (int8 weights, activations
+# quantized per call) to opt in to a smaller model; either way the build
+# fails if the result drifts from Keras past TOLERANCE below.
+with open("diet_workout_model.pkl", "rb") as f:
+    model_dict = pickle.load(f)
+
+model = keras.models.model_from_json(model_dict["model_json"])
+model.set_weights(model_dict["model_weights"])
+model.save("diet_workout_model.keras")
+print("Saved diet_workout_model.keras")
+
+# Export a SavedModel whose "serve" signature names its outputs, so the
+# TFLite signature runner in app.py reads diet and workout by key rather
+# than by tensor order.
+def _serve(features):
+    predicted_diet, predicted_workout = model(features, training=False)
+    return {"diet": predicted_diet, "workout": predicted_workout}
+
+export = keras.export.ExportArchive()
+export.track(model)
+export.add_endpoint(
+    name="serve",
+    fn=_serve,
+    input_signature=[tf.TensorSpec([None, 13], tf.float32, name="features")],
+)
+export.write_out("diet_workout_model_savedmodel")
+
+converter = tf.lite.TFLiteConverter.from_saved_model(
+    "diet_workout_model_savedmodel", signature_keys=["serve"])
+quantization = os.environ.get("TFLITE_QUANTIZATION", "none")
+if quantization == "float16":
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+elif quantization == "dynamic":
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+elif quantization != "none":
+    sys.exit(f"Unknown TFLITE_QUANTIZATION: {quantization!r} (expected none, float16 or dynamic)")
+tflite_model = converter.convert()
+
+# Check the TFLite model against Keras before shipping it. Inputs are
+# drawn from plausible (low, high) ranges of the 13 features, in the order
+# app.py builds the input vector.
+FEATURE_RANGES = [
+    (18, 70),       # age
+    (0, 1),         # gender (0: Male, 1: Female)
+    (150, 200),     # height_cm
+    (45, 120),      # weight_kg
+    (16, 40),       # bmi
+    (8, 40),        # body_fat_percent
+    (20, 70),       # muscle_mass_kg
+    (2, 4),         # bone_mass_kg
+    (45, 65),       # water_percent
+    (1200, 2200),   # bmr_kcal
+    (1, 20),        # visceral_fat
+    (18, 70),       # metabolic_age
+    (0, 2),         # activity_level (0: Sedentary, 1: Moderate, 2: Active)
+]
+# Maximum allowed |TFLite - Keras| per output, in the units the API reports
+TOLERANCE = {"diet": 10.0, "workout": 0.1}   # kcal per day, workout days per week
+
+rng = np.random.default_rng(0)
+low, high = np.array(FEATURE_RANGES, dtype=np.float32).T
+samples = rng.uniform(low, high, size=(500, 13)).astype(np.float32)
+samples[:, [1, 12]] = np.round(samples[:, [1, 12]])  # categorical codes
+
+expected_diet, expected_workout = model.predict(samples, verbose=0)
+interpreter = tf.lite.Interpreter(model_content=tflite_model)
+outputs = interpreter.get_signature_runner("serve")(features=samples)
+
+failed = False
+for name, expected in (("diet", expected_diet), ("workout", expected_workout)):
+    error = float(np.max(np.abs(outputs[name] - expected)))
+    print(f"{name}: max abs error {error:.4f} (tolerance {TOLERANCE[name]})")
+    failed |= error > TOLERANCE[name]
+if failed:
+    sys.exit("TFLite model deviates from the Keras model; not writing diet_workout_model.tflite")
+
+with open("diet_workout_model.tflite", "wb") as f:
+    f.write(tflite_model)
+print("Saved diet_workout_model.tflite")
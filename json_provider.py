@@ -0,0 +1,11 @@
+import orjson
+from quart.json.provider import DefaultJSONProvider
+
+# Quart JSON provider backed by orjson, used by request.get_json() and
+# jsonify() in place of the stdlib json module.
+class OrjsonProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
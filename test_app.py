@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import app as app_module
+
+# A valid /predict body; individual tests override fields as needed.
+BODY = {
+    "age": 30, "gender": 1, "height_cm": 170, "weight_kg": 72.5, "bmi": 24.2,
+    "body_fat_percent": 20.0, "muscle_mass_kg": 50.0, "bone_mass_kg": 3.0,
+    "water_percent": 55.0, "bmr_kcal": 1600, "visceral_fat": 5,
+    "metabolic_age": 28, "activity_level": 1,
+}
+
+# --- Baseline plan logic, as the original handler computed it per request ---
+def baseline_meal_plan(user_allergy):
+    user_allergy = user_allergy.lower()
+    meals = [
+        {"Meal": "Breakfast", "Food": "Oatmeal + Nuts", "Calories": "350 kcal",
+         "Alternative": "Whole Wheat Toast", "Allergen": "nuts"},
+        {"Meal": "Lunch", "Food": "Grilled Chicken + Peanut Sauce", "Calories": "600 kcal",
+         "Alternative": "Tofu + Salad", "Allergen": "nuts"},
+        {"Meal": "Dinner", "Food": "Fish + Almond Quinoa", "Calories": "500 kcal",
+         "Alternative": "Lentil Soup + Rice", "Allergen": "nuts"}
+    ]
+    meal_plan = []
+    for m in meals:
+        if user_allergy and user_allergy in m["Allergen"].lower():
+            meal_plan.append({"Meal": m["Meal"], "Food": m["Alternative"],
+                              "Calories": m["Calories"], "AllergySafe": True})
+        else:
+            meal_plan.append({"Meal": m["Meal"], "Food": m["Food"],
+                              "Calories": m["Calories"], "AllergySafe": True})
+    return meal_plan
+
+def baseline_workout_plan(user_goal):
+    user_goal = user_goal.lower()
+    workouts = [
+        {"Exercise": "Bench Press", "Type": "Strength", "Reps/Sets": "4 sets x 8 reps", "CaloriesBurned": "250 kcal"},
+        {"Exercise": "Deadlifts", "Type": "Strength", "Reps/Sets": "4 sets x 6 reps", "CaloriesBurned": "300 kcal"},
+        {"Exercise": "Cycling", "Type": "Cardio", "Reps/Sets": "30 mins", "CaloriesBurned": "400 kcal"},
+        {"Exercise": "Jump Rope", "Type": "Cardio", "Reps/Sets": "15 mins", "CaloriesBurned": "150 kcal"}
+    ]
+    workout_plan = []
+    for w in workouts:
+        if user_goal == "muscle-gain" and w["Type"].lower() == "strength":
+            workout_plan.append(w)
+        elif user_goal == "weight-loss" and w["Type"].lower() == "cardio":
+            workout_plan.append(w)
+        elif user_goal == "general-fitness":
+            workout_plan.append(w)
+    return workout_plan
+
+def run_with_client(test):
+    # Run `test(client)` inside the app's serving lifecycle, so the batcher
+    # is started and stopped as it is under Uvicorn.
+    async def main():
+        async with app_module.app.test_app() as test_app:
+            return await test(test_app.test_client())
+    return asyncio.run(main())
+
+async def post(client, body=None, **kwargs):
+    if body is not None:
+        kwargs["json"] = body
+    response = await client.post("/predict", **kwargs)
+    return response.status_code, await response.get_json()
+
+# --- Plans match the baseline ---
+@pytest.mark.parametrize("user_allergy", ["", "nuts", "NUTS", "ut", "peanut"])
+@pytest.mark.parametrize("user_goal", ["muscle-gain", "weight-loss", "general-fitness", "Muscle-Gain", "yoga"])
+def test_plans_match_baseline(user_allergy, user_goal):
+    body = {**BODY, "user_allergy": user_allergy, "user_goal": user_goal}
+    status, data = run_with_client(lambda client: post(client, body))
+    assert status == 200
+    assert data["MealPlan"] == baseline_meal_plan(user_allergy)
+    assert data["WorkoutPlan"] == baseline_workout_plan(user_goal)
+    assert data["PredictedDiet"].endswith(" kcal per day")
+    assert data["PredictedWorkout"].endswith(" workout days per week")
+
+def test_default_personalization_matches_baseline():
+    status, data = run_with_client(lambda client: post(client, BODY))
+    assert status == 200
+    assert data["MealPlan"] == baseline_meal_plan("")
+    assert data["WorkoutPlan"] == baseline_workout_plan("general-fitness")
+
+# --- Request schema ---
+def test_missing_field_returns_422():
+    body = {k: v for k, v in BODY.items() if k != "bmi"}
+    status, data = run_with_client(lambda client: post(client, body))
+    assert status == 422
+    assert "bmi" in data["error"]
+
+def test_wrong_type_returns_422():
+    status, data = run_with_client(lambda client: post(client, {**BODY, "age": "30"}))
+    assert status == 422
+    assert "age" in data["error"]
+
+@pytest.mark.parametrize("raw", [b"{not json", b"", b"[1, 2]"])
+def test_malformed_body_is_rejected(raw):
+    status, _ = run_with_client(lambda client: post(
+        client, data=raw, headers={"Content-Type": "application/json"}))
+    assert status in (400, 422)
+
+def test_fractional_and_integral_numbers_are_accepted():
+    body = {**BODY, "height_cm": 170.5, "weight_kg": 72.0, "bmr_kcal": 1600.5, "age": 30.0}
+    status, _ = run_with_client(lambda client: post(client, body))
+    assert status == 200
+
+# --- Batcher ---
+def test_concurrent_requests_get_their_own_predictions(monkeypatch):
+    # Hold the batch window open so all requests land in one batch
+    monkeypatch.setattr(app_module, "MAX_WAIT_MS", 200)
+    bodies = [{**BODY, "bmr_kcal": 1200 + 100 * i, "activity_level": i % 3} for i in range(8)]
+
+    async def test(client):
+        batched = await asyncio.gather(*(post(client, b) for b in bodies))
+        single = [await post(client, b) for b in bodies]
+        return batched, single
+
+    batched, single = run_with_client(test)
+    assert batched == single
+
+def test_prediction_timeout_returns_503(monkeypatch):
+    release = threading.Event()
+
+    def slow_run_batch(batch):
+        release.wait(5)
+        raise RuntimeError("released")
+
+    monkeypatch.setattr(app_module, "_run_batch", slow_run_batch)
+    monkeypatch.setattr(app_module, "BATCH_TIMEOUT", 0.2)
+
+    async def test(client):
+        try:
+            return await post(client, BODY)
+        finally:
+            release.set()
+
+    status, data = run_with_client(test)
+    assert status == 503
+    assert data["error"] == "Prediction timed out"
+
+def test_queue_full_returns_503(monkeypatch):
+    entered = threading.Event()
+    release = threading.Event()
+
+    def blocking_run_batch(batch):
+        entered.set()
+        release.wait(5)
+        raise RuntimeError("released")
+
+    monkeypatch.setattr(app_module, "_run_batch", blocking_run_batch)
+    monkeypatch.setattr(app_module, "MAX_QUEUE", 1)
+    monkeypatch.setattr(app_module, "BATCH_TIMEOUT", 0.5)
+
+    async def test(client):
+        try:
+            first = asyncio.ensure_future(post(client, BODY))     # occupies the batcher
+            deadline = time.monotonic() + 5
+            while not entered.is_set() and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            queued = asyncio.ensure_future(post(client, BODY))    # fills the queue
+            await asyncio.sleep(0.05)
+            rejected = await post(client, BODY)
+            return rejected, await queued, await first
+        finally:
+            release.set()
+
+    rejected, queued, first = run_with_client(test)
+    assert rejected == (503, {"error": "Server busy, try again later"})
+    assert queued == (503, {"error": "Prediction timed out"})
+    assert first == (503, {"error": "Prediction timed out"})
+
+def test_model_error_returns_500(monkeypatch):
+    def failing_run_batch(batch):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(app_module, "_run_batch", failing_run_batch)
+    status, data = run_with_client(lambda client: post(client, BODY))
+    assert status == 500
+    assert data["error"] == "Prediction failed: boom"
+
+def test_bad_row_fails_only_its_own_request(monkeypatch):
+    monkeypatch.setattr(app_module, "MAX_WAIT_MS", 200)
+
+    async def test(client):
+        bad = asyncio.get_running_loop().create_future()
+        app_module._pending.put_nowait((("not a number",) * 13, bad))
+        good = await post(client, BODY)
+        with pytest.raises(ValueError):
+            await bad
+        return good
+
+    status, data = run_with_client(test)
+    assert status == 200
+    assert data["MealPlan"] == baseline_meal_plan("")
@@ -1,13 +1,17 @@
-from flask import Flask, request, jsonify
+from quart import Quart, request, jsonify
+import mmap
 import pickle
 import numpy as np
+from json_provider import OrjsonProvider
 
-app = Flask(__name__)
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
 
 # Attempt to load the pre-trained model from a pickle file.
 try:
     with open("diet_workout_model.pkl", "rb") as f:
-        loaded_obj = pickle.load(f)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            loaded_obj = pickle.loads(mm)
 except Exception as e:
     loaded_obj = None
     print("Error loading model:", e)
@@ -35,15 +39,15 @@ else:
 
 # Home route for a friendly welcome message.
 @app.route("/", methods=["GET"])
-def home():
+async def home():
     return jsonify({
         "message": "Welcome to the Diet & Workout API. Use the /predict endpoint with a POST request to get predictions."
     })
 
 # Predict endpoint to generate meal and workout plans.
 @app.route("/predict", methods=["POST"])
-def predict_route():
-    data = request.get_json()
+async def predict_route():
+    data = await request.get_json()
 
     # Parse required input parameters.
     try:
@@ -133,4 +137,4 @@ def predict_route():
     return jsonify(response)
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run(debug=False)